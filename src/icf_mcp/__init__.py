@@ -6,7 +6,7 @@ the WHO ICF classification system.
 """
 
 from .server import main, mcp
-from .who_client import WHOICFClient, ICFEntity, ICFSearchResult
+from .who_client import APIError, WHOICFClient, ICFEntity, ICFSearchResult
 
 __version__ = "0.2.0"
 __all__ = [
@@ -15,4 +15,5 @@ __all__ = [
     "WHOICFClient",
     "ICFEntity",
     "ICFSearchResult",
+    "APIError",
 ]
@@ -13,11 +13,23 @@ import logging
 import os
 import re
 import sys
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from typing import Any
 
-from mcp.server.fastmcp import FastMCP
-
-from .who_client import WHOICFClient, ICFEntity
+from mcp.server.fastmcp import Context, FastMCP
+from pydantic import BaseModel
+
+from .who_client import (
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_CACHE_TTL,
+    DEFAULT_DISK_CACHE_PATH,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_RPS,
+    WHOICFClient,
+    ICFEntity,
+)
 from . import instruments as inst
 
 # Configure logging to stderr (important for STDIO transport)
@@ -28,60 +40,122 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def create_client() -> WHOICFClient:
+    """Create the WHO ICF API client from environment configuration"""
+    client_id = os.environ.get("WHO_ICD_CLIENT_ID")
+    client_secret = os.environ.get("WHO_ICD_CLIENT_SECRET")
+    
+    if not client_id or not client_secret:
+        logger.warning(
+            "WHO ICD-API credentials not set. "
+            "Set WHO_ICD_CLIENT_ID and WHO_ICD_CLIENT_SECRET environment variables. "
+            "Register at https://icd.who.int/icdapi to obtain credentials."
+        )
+    
+    disk_cache_enabled = os.environ.get("ICF_DISK_CACHE", "1") != "0"
+
+    return WHOICFClient(
+        client_id=client_id,
+        client_secret=client_secret,
+        release=os.environ.get("WHO_ICD_RELEASE", "2025-01"),
+        language=os.environ.get("WHO_ICD_LANGUAGE", "en"),
+        cache_size=int(os.environ.get("ICF_CACHE_SIZE", DEFAULT_CACHE_SIZE)),
+        cache_ttl=float(os.environ.get("ICF_CACHE_TTL", DEFAULT_CACHE_TTL)),
+        max_concurrency=int(
+            os.environ.get("ICF_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)
+        ),
+        disk_cache_path=DEFAULT_DISK_CACHE_PATH if disk_cache_enabled else None,
+        max_rps=float(os.environ.get("WHO_ICD_MAX_RPS", DEFAULT_MAX_RPS)),
+    )
+
+
+@dataclass
+class AppContext:
+    """Resources shared by all tool calls for the lifetime of the server"""
+    client: WHOICFClient
+
+
+@asynccontextmanager
+async def app_lifespan(server: FastMCP) -> AsyncIterator[AppContext]:
+    """Create the WHO API client on startup and close its connections on shutdown"""
+    client = create_client()
+    try:
+        yield AppContext(client=client)
+    finally:
+        await client.close()
+
+
 # Create the MCP server
 mcp = FastMCP(
     "ICF Classification Server",
     dependencies=["httpx", "pydantic"],
+    lifespan=app_lifespan,
 )
 
-# Global client instance (initialized on first use)
-_client: WHOICFClient | None = None
 
+def get_client(ctx: Context) -> WHOICFClient:
+    """Get the WHO ICF API client created by the server lifespan"""
+    return ctx.request_context.lifespan_context.client
 
-def get_client() -> WHOICFClient:
-    """Get or create the WHO ICF API client"""
-    global _client
-    if _client is None:
-        client_id = os.environ.get("WHO_ICD_CLIENT_ID")
-        client_secret = os.environ.get("WHO_ICD_CLIENT_SECRET")
-        
-        if not client_id or not client_secret:
-            logger.warning(
-                "WHO ICD-API credentials not set. "
-                "Set WHO_ICD_CLIENT_ID and WHO_ICD_CLIENT_SECRET environment variables. "
-                "Register at https://icd.who.int/icdapi to obtain credentials."
-            )
-        
-        _client = WHOICFClient(
-            client_id=client_id,
-            client_secret=client_secret,
-            release=os.environ.get("WHO_ICD_RELEASE", "2025-01"),
-            language=os.environ.get("WHO_ICD_LANGUAGE", "en"),
+
+def _bullet_block(heading: str, items: Sequence[str]) -> str:
+    """Render a bold heading followed by an indented bullet per item"""
+    return f"\n**{heading}:**\n  - " + "\n  - ".join(items)
+
+
+# Structured results, returned by the lookup/search tools when as_text=False
+class ICFCodeDetails(BaseModel):
+    """Full details of an ICF code"""
+    code: str
+    title: str
+    definition: str | None = None
+    inclusions: list[str] = []
+    exclusions: list[str] = []
+
+    @classmethod
+    def from_entity(cls, entity: ICFEntity) -> "ICFCodeDetails":
+        return cls(
+            code=entity.code,
+            title=entity.title,
+            definition=entity.definition,
+            inclusions=list(entity.inclusions or ()),
+            exclusions=list(entity.exclusions or ()),
         )
-    
-    return _client
+
+
+class ICFCodeSummary(BaseModel):
+    """An ICF code and its title"""
+    code: str
+    title: str
+
+
+class ICFSearchHit(BaseModel):
+    """A search match with its relevance score"""
+    code: str
+    title: str
+    score: float
+
+
+class ICFBatchLookup(BaseModel):
+    """Results of a multi-code lookup"""
+    found: list[ICFCodeDetails]
+    not_found: list[str]
 
 
 def format_entity(entity: ICFEntity) -> str:
     """Format an ICF entity for display"""
-    lines = [
-        f"**{entity.code}**: {entity.title}",
-    ]
-    
+    header = f"**{entity.code}**: {entity.title}"
+    if not (entity.definition or entity.inclusions or entity.exclusions):
+        return header
+
+    parts = [header]
     if entity.definition:
-        lines.append(f"\n**Definition:** {entity.definition}")
-    
+        parts.append(f"\n**Definition:** {entity.definition}")
     if entity.inclusions:
-        lines.append("\n**Includes:**")
-        for inc in entity.inclusions:
-            lines.append(f"  - {inc}")
-    
+        parts.append(_bullet_block("Includes", entity.inclusions))
     if entity.exclusions:
-        lines.append("\n**Excludes:**")
-        for exc in entity.exclusions:
-            lines.append(f"  - {exc}")
-    
-    return "\n".join(lines)
+        parts.append(_bullet_block("Excludes", entity.exclusions))
+    return "\n".join(parts)
 
 
 # =============================================================================
@@ -89,7 +163,7 @@ def format_entity(entity: ICFEntity) -> str:
 # =============================================================================
 
 @mcp.tool()
-async def icf_lookup(code: str) -> str:
+async def icf_lookup(code: str, ctx: Context, as_text: bool = True) -> str | ICFCodeDetails:
     """
     Look up an ICF code and get its full details.
     
@@ -102,12 +176,14 @@ async def icf_lookup(code: str) -> str:
     
     Args:
         code: The ICF code to look up (e.g., "b280", "d450")
+        as_text: Return formatted markdown (default). Set to False for a
+            structured object with code, title, definition, inclusions, exclusions.
         
     Returns:
         Detailed information about the ICF code including definition,
         inclusions, and exclusions.
     """
-    client = get_client()
+    client = get_client(ctx)
     
     try:
         entity = await client.get_entity_by_code(code)
@@ -115,6 +191,8 @@ async def icf_lookup(code: str) -> str:
         if entity is None:
             return f"ICF code '{code}' not found. Please check the code format."
         
+        if not as_text:
+            return ICFCodeDetails.from_entity(entity)
         return format_entity(entity)
         
     except Exception as e:
@@ -122,8 +200,78 @@ async def icf_lookup(code: str) -> str:
         return f"Error looking up ICF code: {str(e)}"
 
 
+# Maximum number of codes accepted by a single icf_lookup_many call
+MAX_BATCH_LOOKUP = 25
+
+
+@mcp.tool()
+async def icf_lookup_many(
+    codes: list[str], ctx: Context, as_text: bool = True
+) -> str | ICFBatchLookup:
+    """
+    Look up several ICF codes in one call and get full details for each.
+
+    Prefer this over repeated `icf_lookup` calls when you already know the
+    codes you need. Codes are fetched concurrently; duplicates are looked up once.
+
+    Args:
+        codes: List of ICF codes (e.g., ["b280", "d450", "e120"]), up to 25
+        as_text: Return formatted markdown (default). Set to False for a
+            structured object with `found` details and `not_found` codes.
+
+    Returns:
+        Full details for each code, one section per code, plus a list of
+        any codes that could not be found.
+    """
+    unique = list(dict.fromkeys(code.strip().lower() for code in codes if code.strip()))
+    if not unique:
+        return "No codes provided. Pass a list of ICF codes (e.g., [\"b280\", \"d450\"])."
+    if len(unique) > MAX_BATCH_LOOKUP:
+        return (
+            f"Too many codes ({len(unique)}). "
+            f"Look up at most {MAX_BATCH_LOOKUP} codes per call."
+        )
+
+    client = get_client(ctx)
+
+    entities = await asyncio.gather(
+        *(client.get_entity_by_code(c) for c in unique),
+        return_exceptions=True,
+    )
+
+    found: list[ICFEntity] = []
+    not_found: list[str] = []
+
+    for code, entity in zip(unique, entities):
+        if isinstance(entity, Exception):
+            logger.error(f"Error looking up ICF code {code}: {entity}")
+            not_found.append(code)
+        elif entity is None:
+            not_found.append(code)
+        else:
+            found.append(entity)
+
+    if not as_text:
+        return ICFBatchLookup(
+            found=[ICFCodeDetails.from_entity(e) for e in found],
+            not_found=not_found,
+        )
+
+    sections = [format_entity(e) for e in found]
+
+    lines = [f"**ICF Lookup: {len(sections)} of {len(unique)} code(s) found**\n"]
+    lines.append("\n\n---\n\n".join(sections))
+
+    if not_found:
+        lines.append(f"\n**Codes not found:** {', '.join(not_found)}")
+
+    return "\n".join(lines)
+
+
 @mcp.tool()
-async def icf_search(query: str, max_results: int = 10) -> str:
+async def icf_search(
+    query: str, ctx: Context, max_results: int = 10, as_text: bool = True
+) -> str | list[ICFSearchHit]:
     """
     Search the ICF classification by keywords or description.
     
@@ -136,11 +284,13 @@ async def icf_search(query: str, max_results: int = 10) -> str:
     Args:
         query: Search terms (e.g., "walking difficulty", "memory problems")
         max_results: Maximum number of results to return (default 10)
+        as_text: Return formatted markdown (default). Set to False for a
+            structured list of {code, title, score} matches.
         
     Returns:
         List of matching ICF codes with titles and relevance scores.
     """
-    client = get_client()
+    client = get_client(ctx)
     
     try:
         results = await client.search(query, max_results=max_results)
@@ -148,6 +298,9 @@ async def icf_search(query: str, max_results: int = 10) -> str:
         if not results:
             return f"No ICF codes found for '{query}'. Try different search terms."
         
+        if not as_text:
+            return [ICFSearchHit(code=r.code, title=r.title, score=r.score) for r in results]
+        
         lines = [f"**ICF Search Results for '{query}':**\n"]
         
         for i, result in enumerate(results, 1):
@@ -163,7 +316,7 @@ async def icf_search(query: str, max_results: int = 10) -> str:
 
 
 @mcp.tool()
-async def icf_browse_category(category: str) -> str:
+async def icf_browse_category(category: str, ctx: Context) -> str:
     """
     Browse an ICF category or sub-chapter to explore available codes.
 
@@ -181,7 +334,7 @@ async def icf_browse_category(category: str) -> str:
     Returns:
         Overview of the category/sub-chapter with child codes.
     """
-    client = get_client()
+    client = get_client(ctx)
 
     try:
         result = await client.browse_category(category)
@@ -212,7 +365,9 @@ async def icf_browse_category(category: str) -> str:
 
 
 @mcp.tool()
-async def icf_get_children(code: str) -> str:
+async def icf_get_children(
+    code: str, ctx: Context, as_text: bool = True
+) -> str | list[ICFCodeSummary]:
     """
     Get the child codes (subcategories) of an ICF code.
     
@@ -225,11 +380,13 @@ async def icf_get_children(code: str) -> str:
     
     Args:
         code: Parent ICF code to get children for
+        as_text: Return formatted markdown (default). Set to False for a
+            structured list of {code, title} children.
         
     Returns:
         List of child codes under the specified parent.
     """
-    client = get_client()
+    client = get_client(ctx)
     
     try:
         children = await client.get_children(code)
@@ -237,6 +394,9 @@ async def icf_get_children(code: str) -> str:
         if not children:
             return f"No child codes found for '{code}'. This may be a leaf-level code."
         
+        if not as_text:
+            return [ICFCodeSummary(code=c.code, title=c.title) for c in children]
+        
         lines = [f"**Child codes under {code}:**\n"]
         
         for child in children:
@@ -272,6 +432,18 @@ async def icf_explain_qualifier(component: str = "generic", qualifier: int | Non
         Explanation of qualifier system for the specified component.
     """
     comp = component.strip().lower()
+    if comp in _SINGLE_RESPONSE_COMPONENTS:
+        qualifier = None  # s, d and e always show their full reference
+
+    response = _QUALIFIER_RESPONSES.get((comp, qualifier))
+    if response is not None:
+        return response
+    return _explain_qualifier(component, qualifier)
+
+
+def _explain_qualifier(component: str, qualifier: int | None) -> str:
+    """Build the icf_explain_qualifier response for a component and optional value"""
+    comp = component.strip().lower()
 
     if comp == "generic" or comp == "b":
         label = "Body Functions (b) — Extent of Impairment" if comp == "b" else "Generic Severity Scale"
@@ -350,15 +522,8 @@ async def icf_explain_qualifier(component: str = "generic", qualifier: int | Non
     )
 
 
-@mcp.tool()
-async def icf_overview() -> str:
-    """
-    Get an overview of the ICF classification system.
-    
-    Returns:
-        General information about ICF, its structure, and how to use it.
-    """
-    return """
+# Static ICF overview text returned by icf_overview
+_ICF_OVERVIEW = """
 **International Classification of Functioning, Disability and Health (ICF)**
 
 The ICF is a WHO classification that provides a standard language and framework 
@@ -432,6 +597,7 @@ Generic severity scale (0-4): 0=none, 1=mild, 2=moderate, 3=severe, 4=complete
 ## Tools Available
 
 - `icf_lookup`: Get details for a specific code
+- `icf_lookup_many`: Get details for several codes at once
 - `icf_search`: Find codes by keyword
 - `icf_browse_category`: Explore a category or sub-chapter (b, d4, e3, etc.)
 - `icf_get_children`: Get subcodes of a code
@@ -450,7 +616,18 @@ ICF official site: https://www.who.int/standards/classifications/international-c
 
 
 @mcp.tool()
-async def icf_get_parent(code: str) -> str:
+async def icf_overview() -> str:
+    """
+    Get an overview of the ICF classification system.
+    
+    Returns:
+        General information about ICF, its structure, and how to use it.
+    """
+    return _ICF_OVERVIEW
+
+
+@mcp.tool()
+async def icf_get_parent(code: str, ctx: Context) -> str:
     """
     Get the parent category of an ICF code to navigate up the hierarchy.
 
@@ -466,7 +643,7 @@ async def icf_get_parent(code: str) -> str:
     Returns:
         Parent code details and the relationship to the child code.
     """
-    client = get_client()
+    client = get_client(ctx)
 
     try:
         entity, parent = await client.get_parent(code)
@@ -497,7 +674,7 @@ async def icf_get_parent(code: str) -> str:
 
 
 @mcp.tool()
-async def icf_get_siblings(code: str) -> str:
+async def icf_get_siblings(code: str, ctx: Context) -> str:
     """
     Get sibling codes — other codes at the same level sharing the same parent.
 
@@ -511,7 +688,7 @@ async def icf_get_siblings(code: str) -> str:
     Returns:
         List of sibling codes with titles.
     """
-    client = get_client()
+    client = get_client(ctx)
 
     try:
         entity, siblings = await client.get_siblings(code)
@@ -635,6 +812,22 @@ def _scale_meaning(scale: dict[int, Any], value: int) -> str:
     return entry
 
 
+# Components whose explanation doesn't depend on a specific qualifier value
+_SINGLE_RESPONSE_COMPONENTS = ("s", "d", "e")
+
+# Every valid icf_explain_qualifier response, keyed by (component, qualifier).
+# Only invalid values and unknown components are formatted per call.
+_QUALIFIER_RESPONSES: dict[tuple[str, int | None], str] = {
+    (comp, q): _explain_qualifier(comp, q)
+    for comp, values in [
+        ("generic", [None, *_GENERIC_SCALE]),
+        ("b", [None, *_GENERIC_SCALE]),
+        *((comp, [None]) for comp in _SINGLE_RESPONSE_COMPONENTS),
+    ]
+    for q in values
+}
+
+
 def _parse_icf_code(raw: str) -> dict[str, Any]:
     """
     Parse a raw ICF code string (with or without qualifiers) into its components.
@@ -762,7 +955,7 @@ def _parse_icf_code(raw: str) -> dict[str, Any]:
 
 
 @mcp.tool()
-async def icf_validate_code(code: str) -> str:
+async def icf_validate_code(code: str, ctx: Context) -> str:
     """
     Validate an ICF code — check format, qualifiers, and verify it exists.
 
@@ -804,7 +997,7 @@ async def icf_validate_code(code: str) -> str:
             lines.append(f"- **{q['name']}:** {q['value']} — {q['meaning']}")
 
     # Verify base code against the WHO API
-    client = get_client()
+    client = get_client(ctx)
     try:
         entity = await client.get_entity_by_code(base_code)
         if entity:
@@ -826,7 +1019,7 @@ async def icf_validate_code(code: str) -> str:
 
 
 @mcp.tool()
-async def icf_parse_qualified_code(code: str) -> str:
+async def icf_parse_qualified_code(code: str, ctx: Context) -> str:
     """
     Parse a fully qualified ICF code and explain each qualifier component.
 
@@ -854,7 +1047,7 @@ async def icf_parse_qualified_code(code: str) -> str:
     lines = [f"**Parsed: {code.strip()}**\n"]
 
     # Look up the base code
-    client = get_client()
+    client = get_client(ctx)
     try:
         entity = await client.get_entity_by_code(base_code)
         if entity:
@@ -893,7 +1086,7 @@ async def icf_parse_qualified_code(code: str) -> str:
 
 
 @mcp.tool()
-async def icf_build_profile(codes: list[str]) -> str:
+async def icf_build_profile(codes: list[str], ctx: Context) -> str:
     """
     Build an ICF functional profile from multiple codes.
 
@@ -910,7 +1103,7 @@ async def icf_build_profile(codes: list[str]) -> str:
     if not codes:
         return "No codes provided. Pass a list of ICF codes (e.g., [\"b280\", \"d450\"])."
 
-    client = get_client()
+    client = get_client(ctx)
 
     components: dict[str, dict] = {
         prefix: {"name": name, "items": []} for prefix, name in _COMPONENTS.items()
@@ -950,7 +1143,7 @@ async def icf_build_profile(codes: list[str]) -> str:
 
 
 @mcp.tool()
-async def icf_get_code_chain(code: str) -> str:
+async def icf_get_code_chain(code: str, ctx: Context) -> str:
     """
     Show the full hierarchical path from the ICF root down to a specific code.
 
@@ -965,7 +1158,7 @@ async def icf_get_code_chain(code: str) -> str:
     Returns:
         Hierarchical chain from root to the specified code.
     """
-    client = get_client()
+    client = get_client(ctx)
 
     try:
         chain = await client.get_code_chain(code)
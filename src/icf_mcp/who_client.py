@@ -6,12 +6,22 @@ API Documentation: https://icd.who.int/docs/icd-api/APIDoc-Version2/
 """
 
 import asyncio
+import importlib.util
 import logging
+import os
 import re
-from dataclasses import dataclass
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from itertools import islice
+from pathlib import Path
 from typing import Any
+from urllib.parse import urlsplit
 
 import httpx
+import orjson
+from cachetools import TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -19,12 +29,47 @@ logger = logging.getLogger(__name__)
 TOKEN_ENDPOINT = "https://icdaccessmanagement.who.int/connect/token"
 API_BASE_URL = "https://id.who.int"
 
+# HTTP/2 multiplexes concurrent requests over one connection; needs the optional h2 package
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Every request goes to the same host, so keep a small pool of long-lived connections
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+HTTP_LIMITS = httpx.Limits(
+    max_connections=32,
+    max_keepalive_connections=16,
+    keepalive_expiry=60.0,
+)
+USER_AGENT = "icf-mcp-server"
+
+# Refresh the access token this many seconds before it actually expires
+TOKEN_EXPIRY_MARGIN = 60
+
 # ICF linearization name in the API
 ICF_LINEARIZATION = "icf"
 
 # Default API version
 DEFAULT_RELEASE = "2025-01"
 
+# Entity cache defaults (ICF releases are immutable, so an hour is conservative)
+DEFAULT_CACHE_SIZE = 2048
+DEFAULT_CACHE_TTL = 3600.0
+
+# Codes the API reported as unknown are remembered for a shorter time
+NEGATIVE_CACHE_SIZE = 512
+NEGATIVE_CACHE_TTL = 300.0
+
+# Outbound request budget, to stay within the WHO API rate limits under bursts
+DEFAULT_MAX_RPS = 10.0
+
+# On-disk response cache, reused across server restarts. The release is appended
+# to the file name; the oldest rows are pruned beyond the row cap.
+DEFAULT_DISK_CACHE_PATH = Path.home() / ".cache" / "icf_mcp" / "http.sqlite"
+DISK_CACHE_MAX_ROWS = 50_000
+DISK_CACHE_PRUNE_INTERVAL = 1000  # Writes between prunes
+
+# Maximum number of entity fetches a single fan-out keeps in flight
+DEFAULT_MAX_CONCURRENCY = 8
+
 # ICF component letter → component name
 CATEGORY_NAMES = {
     "b": "Body Functions",
@@ -34,46 +79,217 @@ CATEGORY_NAMES = {
 }
 
 
-@dataclass
+class APIError(Exception):
+    """A WHO ICD-API request that returned a non-200 status"""
+
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"API request failed: {status_code} - {text}")
+        self.status_code = status_code
+
+
+def _value_of(value: Any) -> str | None:
+    """Unwrap a JSON-LD {"@language": ..., "@value": ...} field; plain values pass through as str"""
+    if isinstance(value, dict):
+        return value.get("@value")
+    return str(value)
+
+
+def _label_of(item: Any) -> str:
+    """Display label of one inclusion/exclusion entry"""
+    if not isinstance(item, dict):
+        return str(item)
+    label = item.get("label")
+    value = label.get("@value") if isinstance(label, dict) else None
+    return value if value is not None else str(item)
+
+
+def _labels(items: list[Any]) -> tuple[str, ...]:
+    """Extract display labels from an inclusion/exclusion list"""
+    if not items:
+        return ()
+    # Lists are normally all plain strings or all objects; the string case needs
+    # no unwrapping, and anything mixed goes through the per-item path
+    if not isinstance(items[0], dict) and not any(isinstance(i, dict) for i in items):
+        return tuple(map(str, items))
+    return tuple(map(_label_of, items))
+
+
+@dataclass(slots=True, frozen=True)
 class ICFEntity:
     """Represents an ICF entity (code, category, or item)"""
     code: str
     title: str
     definition: str | None = None
-    inclusions: list[str] | None = None
-    exclusions: list[str] | None = None
+    inclusions: tuple[str, ...] | None = None
+    exclusions: tuple[str, ...] | None = None
     parent: str | None = None
-    children: list[str] | None = None
+    children: tuple[str, ...] | None = None
     uri: str | None = None
-    
-    def to_dict(self) -> dict[str, Any]:
-        return {
-            "code": self.code,
-            "title": self.title,
-            "definition": self.definition,
-            "inclusions": self.inclusions,
-            "exclusions": self.exclusions,
-            "parent": self.parent,
-            "children": self.children,
-            "uri": self.uri,
-        }
+    # Code/title stubs aligned with `children`, when the response embedded them
+    child_stubs: tuple["ICFEntity | None", ...] | None = field(
+        default=None, repr=False, compare=False
+    )
 
 
-@dataclass 
+def _parse_children(
+    child_data: Any,
+) -> tuple[tuple[str, ...] | None, tuple[ICFEntity | None, ...] | None]:
+    """
+    Split a "child" field into child URIs and, where present, inline stubs.
+
+    Children are usually bare URIs. Entries given as objects carrying a code and
+    a label/title become ICFEntity stubs, so listing them needs no extra request.
+    """
+    if isinstance(child_data, str):
+        return (child_data,), None
+    if not isinstance(child_data, list):
+        return None, None
+
+    uris = []
+    stubs: list[ICFEntity | None] = []
+    for item in child_data:
+        if not isinstance(item, dict):
+            uris.append(str(item))
+            stubs.append(None)
+            continue
+        uri = item.get("@id", item.get("id", ""))
+        code = item.get("code", item.get("theCode"))
+        title = _value_of(item.get("label", item.get("title")) or "")
+        uris.append(uri)
+        stubs.append(ICFEntity(code=code, title=title, uri=uri) if code and title else None)
+
+    return tuple(uris), tuple(stubs) if any(stubs) else None
+
+
+@dataclass(slots=True, frozen=True)
 class ICFSearchResult:
     """Represents a search result from the ICF API"""
     code: str
     title: str
     score: float
     uri: str
-    
-    def to_dict(self) -> dict[str, Any]:
-        return {
-            "code": self.code,
-            "title": self.title,
-            "score": self.score,
-            "uri": self.uri,
-        }
+
+
+class _NoCache(dict):
+    """Stand-in for a TTLCache when in-memory caching is disabled: stores nothing"""
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        pass
+
+
+def _make_cache(size: int, ttl: float) -> TTLCache | _NoCache:
+    """Create an entity cache, or a no-op one when size is below 1"""
+    return TTLCache(maxsize=size, ttl=ttl) if size > 0 else _NoCache()
+
+
+class _DiskCache:
+    """
+    SQLite-backed store of API responses that survives process restarts.
+
+    Each release gets its own file next to `path` (http.sqlite → http-2025-01.sqlite),
+    so servers configured for different releases never evict each other's rows.
+    Reads and writes run in a worker thread so they never block the event loop.
+    """
+
+    def __init__(
+        self, path: str | os.PathLike, release: str, max_rows: int = DISK_CACHE_MAX_ROWS
+    ):
+        path = Path(path)
+        path = path.with_name(f"{path.stem}-{release}{path.suffix}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._max_rows = max_rows
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()  # One connection, shared by worker threads
+        try:
+            # WAL with synchronous=NORMAL avoids an fsync on every commit
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key BLOB PRIMARY KEY, body BLOB NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._prune()
+        except sqlite3.Error:
+            self._conn.close()
+            raise
+
+    async def get(self, key: bytes) -> dict[str, Any] | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: bytes, body: dict[str, Any]) -> None:
+        await asyncio.to_thread(self._set, key, orjson.dumps(body))
+
+    def _get(self, key: bytes) -> dict[str, Any] | None:
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT body FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                try:
+                    return orjson.loads(row[0])
+                except orjson.JSONDecodeError:
+                    # Drop the corrupt row so the caller's fresh fetch replaces it
+                    logger.warning("Discarding corrupt disk cache entry")
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                    return None
+            except sqlite3.Error as e:
+                logger.warning(f"Disk cache read failed: {e}")
+                return None
+
+    def _set(self, key: bytes, body: bytes) -> None:
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, body, stored_at) VALUES (?, ?, ?)",
+                    (key, body, time.time()),
+                )
+                self._writes += 1
+                if self._writes % DISK_CACHE_PRUNE_INTERVAL == 0:
+                    self._prune()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Disk cache write failed: {e}")
+
+    def _prune(self) -> None:
+        """Delete the oldest rows beyond max_rows and commit"""
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (self._max_rows,),
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class _RateLimiter:
+    """Token bucket allowing up to `rate` requests per second, with bursts of one second's worth"""
+
+    def __init__(self, rate: float):
+        self._rate = rate
+        self._capacity = max(rate, 1.0)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated) * self._rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
 
 
 class WHOICFClient:
@@ -90,6 +306,11 @@ class WHOICFClient:
         client_secret: str | None = None,
         release: str = DEFAULT_RELEASE,
         language: str = "en",
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        cache_ttl: float = DEFAULT_CACHE_TTL,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        disk_cache_path: str | os.PathLike | None = None,
+        max_rps: float = DEFAULT_MAX_RPS,
     ):
         """
         Initialize the WHO ICF API client.
@@ -99,24 +320,68 @@ class WHOICFClient:
             client_secret: WHO ICD-API client secret
             release: API release version (e.g., "2025-01")
             language: Language code (e.g., "en", "es", "fr")
+            cache_size: Maximum number of entities kept in each in-memory cache.
+                0 disables in-memory caching.
+            cache_ttl: Seconds before a cached entity is re-fetched
+            max_concurrency: Maximum concurrent entity fetches when resolving child URIs
+                (values below 1 are treated as 1)
+            disk_cache_path: SQLite file for persisting API responses across
+                restarts (e.g., DEFAULT_DISK_CACHE_PATH); the release is appended
+                to its name. None disables it.
+            max_rps: Maximum outbound API requests per second. 0 disables the limit.
         """
         self.client_id = client_id
         self.client_secret = client_secret
         self.release = release
         self.language = language
         self._access_token: str | None = None
+        self._token_expiry = 0.0  # time.monotonic() deadline for the current token
+        self._token_lock = asyncio.Lock()
         self._http_client: httpx.AsyncClient | None = None
+        # Keyed by (release, language, code/uri) so a release or language
+        # change never serves entries fetched under the old settings
+        self._entity_cache = _make_cache(cache_size, cache_ttl)
+        # Codes the API reported as unknown, so repeated guesses don't re-hit it
+        self._missing_codes = _make_cache(
+            min(cache_size, NEGATIVE_CACHE_SIZE), NEGATIVE_CACHE_TTL
+        )
+        self._uri_cache = _make_cache(cache_size, cache_ttl)
+        # Requests currently on the wire, so concurrent identical calls share one
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        # At least one slot, or child fetches would wait forever
+        self._fetch_semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+        # Top-level category browses, keyed by (category, language, release).
+        # Only four categories exist and results are fixed within a release.
+        self._category_cache: dict[tuple[str, str, str], dict[str, Any]] = {}
+        self._rate_limiter = _RateLimiter(max_rps) if max_rps > 0 else None
+        self._disk_cache: _DiskCache | None = None
+        if disk_cache_path is not None:
+            try:
+                self._disk_cache = _DiskCache(disk_cache_path, release)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Disk cache unavailable at {disk_cache_path}: {e}")
     
     async def _get_http_client(self) -> httpx.AsyncClient:
         """Get or create the HTTP client"""
         if self._http_client is None:
-            self._http_client = httpx.AsyncClient(timeout=30.0)
+            self._http_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=HTTP_TIMEOUT,
+                limits=HTTP_LIMITS,
+                headers={"User-Agent": USER_AGENT},
+            )
         return self._http_client
     
+    def _token_valid(self) -> bool:
+        return self._access_token is not None and time.monotonic() < self._token_expiry
+
     async def _ensure_token(self) -> str:
-        """Ensure we have a valid access token"""
-        if self._access_token is None:
-            await self._authenticate()
+        """Ensure we have a valid access token, refreshing it shortly before expiry"""
+        if not self._token_valid():
+            async with self._token_lock:
+                # Another request may have refreshed it while we waited
+                if not self._token_valid():
+                    await self._authenticate()
         return self._access_token  # type: ignore
     
     async def _authenticate(self) -> None:
@@ -143,8 +408,11 @@ class WHOICFClient:
         if response.status_code != 200:
             raise Exception(f"Authentication failed: {response.status_code} - {response.text}")
         
-        data = response.json()
+        data = orjson.loads(response.content)
         self._access_token = data["access_token"]
+        self._token_expiry = (
+            time.monotonic() + data.get("expires_in", 3600) - TOKEN_EXPIRY_MARGIN
+        )
         logger.info("Successfully authenticated with WHO ICD-API")
     
     def _get_headers(self) -> dict[str, str]:
@@ -157,7 +425,52 @@ class WHOICFClient:
         }
     
     async def _api_request(self, endpoint: str, params: dict | None = None) -> dict[str, Any]:
-        """Make an authenticated API request"""
+        """Make an authenticated API request, joining an identical one already in flight"""
+        key = (self.release, self.language, endpoint, tuple(sorted((params or {}).items())))
+
+        disk_key = orjson.dumps(key)
+        if self._disk_cache is not None:
+            cached = await self._disk_cache.get(disk_key)
+            if cached is not None:
+                return cached
+
+        while (inflight := self._inflight.get(key)) is not None:
+            try:
+                # Shielded so cancelling this caller never cancels the shared request
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if (task is not None and task.cancelling()) or not inflight.cancelled():
+                    raise
+                # The caller that owned the request was cancelled; issue our own
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._send_request(endpoint, params)
+        except asyncio.CancelledError:
+            if not future.done():
+                future.cancel()
+            raise
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+                future.exception()  # Mark retrieved in case nobody else was waiting
+            raise
+        else:
+            if not future.done():
+                future.set_result(result)
+            if self._disk_cache is not None:
+                await self._disk_cache.set(disk_key, result)
+            return result
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def _send_request(self, endpoint: str, params: dict | None = None) -> dict[str, Any]:
+        """Send a single authenticated GET request to the API"""
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire()
         await self._ensure_token()
         client = await self._get_http_client()
         
@@ -166,15 +479,15 @@ class WHOICFClient:
         response = await client.get(url, headers=self._get_headers(), params=params)
         
         if response.status_code == 401:
-            # Token expired, re-authenticate
+            # Token rejected despite the expiry tracking, re-authenticate
             self._access_token = None
             await self._ensure_token()
             response = await client.get(url, headers=self._get_headers(), params=params)
         
         if response.status_code != 200:
-            raise Exception(f"API request failed: {response.status_code} - {response.text}")
+            raise APIError(response.status_code, response.text)
         
-        return response.json()
+        return orjson.loads(response.content)
     
     async def get_icf_root(self) -> dict[str, Any]:
         """Get the root of the ICF classification"""
@@ -191,21 +504,45 @@ class WHOICFClient:
         Returns:
             ICFEntity or None if not found
         """
+        cache_key = (self.release, self.language, code)
+        cached = self._entity_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        if cache_key in self._missing_codes:
+            return None
+
         # First use codeinfo to get the stemId for this code
         codeinfo_endpoint = f"/icd/release/11/{self.release}/{ICF_LINEARIZATION}/codeinfo/{code}"
 
         try:
             codeinfo = await self._api_request(codeinfo_endpoint)
+
+            if self._is_full_entity(codeinfo):
+                # The response already carries the entity itself, no second hop needed
+                entity = self._parse_entity(codeinfo)
+                self._entity_cache[cache_key] = entity
+                return entity
+
             stem_id = codeinfo.get("stemId")
             if not stem_id:
                 logger.warning(f"No stemId found for ICF code {code}")
+                self._missing_codes[cache_key] = True
                 return None
 
             # Fetch the full entity using the stemId
-            return await self.get_entity_by_uri(stem_id)
+            entity = await self.get_entity_by_uri(stem_id)
+        except APIError as e:
+            logger.warning(f"Failed to get ICF entity {code}: {e}")
+            if e.status_code == 404:
+                self._missing_codes[cache_key] = True
+            return None
         except Exception as e:
             logger.warning(f"Failed to get ICF entity {code}: {e}")
             return None
+
+        if entity is not None:
+            self._entity_cache[cache_key] = entity
+        return entity
     
     async def get_entity_by_uri(self, uri: str) -> ICFEntity | None:
         """
@@ -217,18 +554,26 @@ class WHOICFClient:
         Returns:
             ICFEntity or None if not found
         """
-        # Convert URI to endpoint path
-        if uri.startswith("http://"):
-            uri = uri.replace("http://", "https://")
-        
-        endpoint = uri.replace(API_BASE_URL, "")
+        # Convert URI to endpoint path. Entity URIs are always on API_BASE_URL but
+        # are often given as http://, so dropping scheme and host also gives a
+        # canonical cache key for both variants.
+        parts = urlsplit(uri)
+        endpoint = f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+        cache_key = (self.release, self.language, endpoint)
+        cached = self._uri_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         try:
             data = await self._api_request(endpoint)
-            return self._parse_entity(data)
+            entity = self._parse_entity(data)
         except Exception as e:
             logger.warning(f"Failed to get ICF entity by URI {uri}: {e}")
             return None
+
+        self._uri_cache[cache_key] = entity
+        return entity
     
     async def search(
         self, 
@@ -255,18 +600,20 @@ class WHOICFClient:
             "highlightingEnabled": "false",
         }
         
+        # The search endpoint has no result-count parameter, so the limit is applied
+        # here. Leaving it out of params also lets every max_results share one
+        # cached response per query.
         data = await self._api_request(endpoint, params)
         
-        results = []
-        for item in data.get("destinationEntities", [])[:max_results]:
-            results.append(ICFSearchResult(
+        return [
+            ICFSearchResult(
                 code=item.get("theCode", ""),
                 title=item.get("title", ""),
                 score=item.get("score", 0.0),
                 uri=item.get("id", ""),
-            ))
-        
-        return results
+            )
+            for item in islice(data.get("destinationEntities", []), max(max_results, 0))
+        ]
     
     async def get_children(self, code: str) -> list[ICFEntity]:
         """
@@ -274,19 +621,47 @@ class WHOICFClient:
         
         Args:
             code: Parent ICF code
-            
+
         Returns:
-            List of child entities
+            List of child entities. Children the API embedded in the parent's
+            response are returned as stubs carrying only code, title and uri
+            (no definition, parent or children).
         """
         entity = await self.get_entity_by_code(code)
         if not entity or not entity.children:
             return []
 
-        fetched = await asyncio.gather(
-            *(self.get_entity_by_uri(uri) for uri in entity.children)
-        )
-        return [child for child in fetched if child]
-    
+        return await self._get_child_entities(entity)
+
+    async def _get_child_limited(self, uri: str) -> ICFEntity | None:
+        """Fetch an entity by URI, holding a slot of the fan-out semaphore"""
+        async with self._fetch_semaphore:
+            return await self.get_entity_by_uri(uri)
+
+    async def _get_child_entities(self, entity: ICFEntity) -> list[ICFEntity]:
+        """
+        Resolve an entity's children, preserving order and dropping misses.
+
+        Children the response already described inline are used as-is; the rest
+        are fetched concurrently.
+        """
+        if not entity.children:
+            return []
+
+        stubs = entity.child_stubs or (None,) * len(entity.children)
+        missing = [uri for uri, stub in zip(entity.children, stubs) if stub is None]
+        fetched = dict(zip(missing, await asyncio.gather(
+            *(self._get_child_limited(uri) for uri in missing),
+            return_exceptions=True,
+        )))
+
+        children = []
+        for uri, stub in zip(entity.children, stubs):
+            child = stub if stub is not None else fetched[uri]
+            if isinstance(child, ICFEntity):
+                children.append(child)
+        return children
+
     async def browse_category(self, category: str) -> dict[str, Any]:
         """
         Browse an ICF category or sub-chapter.
@@ -316,12 +691,7 @@ class WHOICFClient:
                     f"or a valid sub-chapter code."
                 )
 
-            children = []
-            if entity.children:
-                fetched = await asyncio.gather(
-                    *(self.get_entity_by_uri(uri) for uri in entity.children)
-                )
-                children = [c for c in fetched if c]
+            children = await self._get_child_entities(entity)
 
             return {
                 "category": cat,
@@ -341,14 +711,23 @@ class WHOICFClient:
             )
 
         # Top-level category browsing — use search
+        cache_key = (cat, self.language, self.release)
+        cached = self._category_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # No lock across the search: _api_request already merges identical
+        # concurrent requests, and browses of other categories run in parallel
         results = await self.search(CATEGORY_NAMES[cat], max_results=20)
 
-        return {
+        browsed = {
             "category": cat,
             "name": CATEGORY_NAMES[cat],
             "description": self._get_category_description(cat),
-            "results": [r.to_dict() for r in results],
+            "results": [asdict(r) for r in results],
         }
+        self._category_cache[cache_key] = browsed
+        return browsed
     
     def _get_category_description(self, category: str) -> str:
         """Get description for an ICF category"""
@@ -372,42 +751,41 @@ class WHOICFClient:
         }
         return descriptions.get(category, "")
     
+    @staticmethod
+    def _is_full_entity(data: dict[str, Any]) -> bool:
+        """
+        Whether a response is the entity itself rather than just a stemId pointer.
+
+        A title and id alone are not enough: the entity must also carry its
+        definition or children, or the cached result would be missing them.
+        """
+        return (
+            "title" in data
+            and ("@id" in data or "id" in data)
+            and ("definition" in data or "child" in data)
+        )
+
     def _parse_entity(self, data: dict[str, Any]) -> ICFEntity:
         """Parse API response into an ICFEntity"""
         # Extract code from the response
         code = data.get("code", data.get("theCode", ""))
         
         # Get title - handle different response formats
-        title = data.get("title", {})
-        if isinstance(title, dict):
-            title = title.get("@value", str(title))
+        title_field = data.get("title", "")
+        title = _value_of(title_field)
+        if title is None:
+            title = str(title_field)
         
         # Get definition
-        definition = data.get("definition", {})
-        if isinstance(definition, dict):
-            definition = definition.get("@value", None)
+        definition = data.get("definition")
+        if definition is not None:
+            definition = _value_of(definition)
         
-        # Get inclusions
-        inclusions = None
-        if "inclusion" in data:
-            inc_data = data["inclusion"]
-            if isinstance(inc_data, list):
-                inclusions = [
-                    i.get("label", {}).get("@value", str(i)) 
-                    if isinstance(i, dict) else str(i)
-                    for i in inc_data
-                ]
-        
-        # Get exclusions
-        exclusions = None
-        if "exclusion" in data:
-            exc_data = data["exclusion"]
-            if isinstance(exc_data, list):
-                exclusions = [
-                    e.get("label", {}).get("@value", str(e))
-                    if isinstance(e, dict) else str(e)
-                    for e in exc_data
-                ]
+        # Get inclusions / exclusions
+        inc_data = data.get("inclusion")
+        inclusions = _labels(inc_data) if isinstance(inc_data, list) else None
+        exc_data = data.get("exclusion")
+        exclusions = _labels(exc_data) if isinstance(exc_data, list) else None
         
         # Get parent
         parent = None
@@ -419,9 +797,7 @@ class WHOICFClient:
                 parent = parent_data
         
         # Get children
-        children = data.get("child", None)
-        if isinstance(children, str):
-            children = [children]
+        children, child_stubs = _parse_children(data.get("child", None))
         
         return ICFEntity(
             code=code,
@@ -432,6 +808,7 @@ class WHOICFClient:
             parent=parent,
             children=children,
             uri=data.get("@id", data.get("id", None)),
+            child_stubs=child_stubs,
         )
     
     async def get_parent(self, code: str) -> tuple[ICFEntity | None, ICFEntity | None]:
@@ -459,7 +836,8 @@ class WHOICFClient:
             code: ICF code (e.g., "b280")
 
         Returns:
-            Tuple of (entity, list_of_siblings). Entity may be None.
+            Tuple of (entity, list_of_siblings). Entity may be None; siblings
+            may be code/title-only stubs, as with get_children.
         """
         entity = await self.get_entity_by_code(code)
         if not entity or not entity.parent:
@@ -469,11 +847,11 @@ class WHOICFClient:
         if not parent or not parent.children:
             return entity, []
 
-        sibling_uris = [uri for uri in parent.children if uri != entity.uri]
-        fetched = await asyncio.gather(
-            *(self.get_entity_by_uri(uri) for uri in sibling_uris)
-        )
-        siblings = [child for child in fetched if child and child.code != entity.code]
+        fetched = await self._get_child_entities(parent)
+        siblings = [
+            child for child in fetched
+            if child.uri != entity.uri and child.code != entity.code
+        ]
 
         return entity, siblings
 
@@ -507,7 +885,10 @@ class WHOICFClient:
         return chain
 
     async def close(self) -> None:
-        """Close the HTTP client"""
+        """Close the HTTP client and the disk cache"""
         if self._http_client:
             await self._http_client.aclose()
             self._http_client = None
+        if self._disk_cache:
+            self._disk_cache.close()
+            self._disk_cache = None
@@ -0,0 +1,39 @@
+"""Shared fixtures for the WHO ICF client tests"""
+
+import asyncio
+
+import pytest
+
+from icf_mcp.who_client import WHOICFClient
+
+
+class FakeSend:
+    """
+    Stand-in for WHOICFClient._send_request.
+
+    Records every call and, while `gate` is unset, holds requests open so tests
+    can overlap them deterministically.
+    """
+
+    def __init__(self, responses: dict[str, dict] | None = None):
+        self.responses = responses or {}
+        self.calls: list[str] = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self, endpoint: str, params: dict | None = None) -> dict:
+        self.calls.append(endpoint)
+        await self.gate.wait()
+        return self.responses.get(endpoint, {"endpoint": endpoint})
+
+
+@pytest.fixture
+def client():
+    return WHOICFClient(client_id="id", client_secret="secret", max_rps=0)
+
+
+@pytest.fixture
+def fake_send(client, monkeypatch):
+    fake = FakeSend()
+    monkeypatch.setattr(client, "_send_request", fake)
+    return fake
@@ -0,0 +1,78 @@
+"""Tests for the MCP tool functions in icf_mcp.server"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from icf_mcp.server import MAX_BATCH_LOOKUP, ICFBatchLookup, icf_lookup_many
+from icf_mcp.who_client import APIError
+
+ENTITY_RESPONSES = {
+    "/icd/release/11/2025-01/icf/codeinfo/b280": {
+        "code": "b280",
+        "title": {"@value": "Sensation of pain"},
+        "definition": {"@value": "Sensation of unpleasant feeling."},
+        "@id": "http://id.who.int/icd/release/11/2025-01/icf/100",
+    },
+}
+
+
+@pytest.fixture
+def ctx(client, monkeypatch):
+    calls: list[str] = []
+
+    async def send(endpoint, params=None):
+        calls.append(endpoint)
+        if endpoint not in ENTITY_RESPONSES:
+            raise APIError(404, "not found")
+        return ENTITY_RESPONSES[endpoint]
+
+    monkeypatch.setattr(client, "_send_request", send)
+    context = SimpleNamespace(
+        request_context=SimpleNamespace(lifespan_context=SimpleNamespace(client=client))
+    )
+    context.send_calls = calls
+    return context
+
+
+# =============================================================================
+# icf_lookup_many
+# =============================================================================
+
+async def test_lookup_many_rejects_blank_codes(ctx):
+    result = await icf_lookup_many(["  ", ""], ctx)
+
+    assert result.startswith("No codes provided")
+    assert ctx.send_calls == []
+
+
+async def test_lookup_many_dedupes_normalised_codes(ctx):
+    result = await icf_lookup_many(["b280", " B280 "], ctx)
+
+    assert "1 of 1 code(s) found" in result
+    assert len(ctx.send_calls) == 1
+
+
+async def test_lookup_many_caps_batch_size(ctx):
+    codes = [f"d{n}" for n in range(MAX_BATCH_LOOKUP + 1)]
+
+    result = await icf_lookup_many(codes, ctx)
+
+    assert result.startswith(f"Too many codes ({MAX_BATCH_LOOKUP + 1})")
+    assert ctx.send_calls == []
+
+
+async def test_lookup_many_splits_found_and_not_found_as_text(ctx):
+    result = await icf_lookup_many(["b280", "b9999"], ctx)
+
+    assert "1 of 2 code(s) found" in result
+    assert "**b280**: Sensation of pain" in result
+    assert "**Codes not found:** b9999" in result
+
+
+async def test_lookup_many_splits_found_and_not_found_structured(ctx):
+    result = await icf_lookup_many(["b280", "b9999"], ctx, as_text=False)
+
+    assert isinstance(result, ICFBatchLookup)
+    assert [d.code for d in result.found] == ["b280"]
+    assert result.not_found == ["b9999"]
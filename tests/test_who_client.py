@@ -0,0 +1,506 @@
+"""Tests for WHOICFClient request handling and caching"""
+
+import asyncio
+import sqlite3
+import time
+
+import httpx
+import pytest
+
+from icf_mcp import who_client
+from icf_mcp.who_client import (
+    TOKEN_EXPIRY_MARGIN,
+    APIError,
+    WHOICFClient,
+    _DiskCache,
+    _RateLimiter,
+)
+
+
+async def _settle():
+    """Let pending tasks run up to their next await"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+# =============================================================================
+# In-flight request deduplication
+# =============================================================================
+
+async def test_concurrent_identical_requests_share_one_send(client, fake_send):
+    fake_send.gate.clear()
+    tasks = [asyncio.create_task(client._api_request("/entity")) for _ in range(3)]
+    await _settle()
+    fake_send.gate.set()
+
+    results = await asyncio.gather(*tasks)
+
+    assert fake_send.calls == ["/entity"]
+    assert results == [{"endpoint": "/entity"}] * 3
+
+
+async def test_cancelled_joiner_does_not_affect_owner(client, fake_send):
+    fake_send.gate.clear()
+    owner = asyncio.create_task(client._api_request("/entity"))
+    await _settle()
+    joiner = asyncio.create_task(client._api_request("/entity"))
+    await _settle()
+
+    joiner.cancel()
+    await _settle()
+    fake_send.gate.set()
+
+    assert await owner == {"endpoint": "/entity"}
+    assert joiner.cancelled()
+    assert fake_send.calls == ["/entity"]
+
+
+async def test_cancelled_owner_lets_joiner_retry(client, fake_send):
+    fake_send.gate.clear()
+    owner = asyncio.create_task(client._api_request("/entity"))
+    await _settle()
+    joiner = asyncio.create_task(client._api_request("/entity"))
+    await _settle()
+
+    owner.cancel()
+    await _settle()
+    fake_send.gate.set()
+
+    assert await joiner == {"endpoint": "/entity"}
+    assert owner.cancelled()
+    assert fake_send.calls == ["/entity", "/entity"]
+    assert client._inflight == {}
+
+
+async def test_failed_request_is_raised_to_every_caller(client, monkeypatch):
+    gate = asyncio.Event()
+    calls = []
+
+    async def failing_send(endpoint, params=None):
+        calls.append(endpoint)
+        await gate.wait()
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(client, "_send_request", failing_send)
+    tasks = [asyncio.create_task(client._api_request("/entity")) for _ in range(2)]
+    await _settle()
+    gate.set()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert calls == ["/entity"]
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+# =============================================================================
+# OAuth token refresh
+# =============================================================================
+
+@pytest.fixture
+def token_requests(client):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(
+            200, json={"access_token": f"token-{len(requests)}", "expires_in": 3600}
+        )
+
+    client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return requests
+
+
+async def test_token_reused_until_expiry(client, token_requests):
+    assert await client._ensure_token() == "token-1"
+    assert await client._ensure_token() == "token-1"
+    assert len(token_requests) == 1
+
+
+async def test_token_refreshed_before_expiry(client, token_requests):
+    before = time.monotonic()
+    await client._ensure_token()
+
+    # Expiry is tracked from expires_in, minus the safety margin
+    expected = before + 3600 - TOKEN_EXPIRY_MARGIN
+    assert expected <= client._token_expiry <= time.monotonic() + 3600 - TOKEN_EXPIRY_MARGIN
+
+    client._token_expiry = time.monotonic() - 1
+    assert await client._ensure_token() == "token-2"
+    assert len(token_requests) == 2
+
+
+async def test_concurrent_refresh_authenticates_once(client, token_requests):
+    tokens = await asyncio.gather(*(client._ensure_token() for _ in range(5)))
+
+    assert tokens == ["token-1"] * 5
+    assert len(token_requests) == 1
+
+
+# =============================================================================
+# Outbound rate limiting
+# =============================================================================
+
+async def test_rate_limiter_allows_one_second_burst():
+    limiter = _RateLimiter(20)
+    start = time.monotonic()
+    for _ in range(20):
+        await limiter.acquire()
+    assert time.monotonic() - start < 0.05
+
+
+async def test_rate_limiter_waits_once_burst_is_spent():
+    limiter = _RateLimiter(20)
+    for _ in range(20):
+        await limiter.acquire()
+
+    start = time.monotonic()
+    for _ in range(4):
+        await limiter.acquire()
+    # Four more tokens at 20/s take about 0.2s to refill
+    assert 0.15 <= time.monotonic() - start < 0.5
+
+
+def test_zero_max_rps_disables_rate_limiter():
+    assert WHOICFClient(max_rps=0)._rate_limiter is None
+    assert WHOICFClient(max_rps=5)._rate_limiter is not None
+
+
+# =============================================================================
+# Negative caching of unknown codes
+# =============================================================================
+
+def _failing_send(status_code: int, calls: list[str]):
+    async def send(endpoint, params=None):
+        calls.append(endpoint)
+        raise APIError(status_code, "error")
+    return send
+
+
+async def test_unknown_code_is_not_requested_again(client, monkeypatch):
+    calls: list[str] = []
+    monkeypatch.setattr(client, "_send_request", _failing_send(404, calls))
+
+    assert await client.get_entity_by_code("b9999") is None
+    assert await client.get_entity_by_code("b9999") is None
+    assert len(calls) == 1
+
+
+async def test_code_without_stem_id_is_cached_as_missing(client, fake_send):
+    fake_send.responses = {
+        f"/icd/release/11/{client.release}/icf/codeinfo/b9999": {"code": "b9999"},
+    }
+
+    assert await client.get_entity_by_code("b9999") is None
+    assert await client.get_entity_by_code("b9999") is None
+    assert len(fake_send.calls) == 1
+
+
+async def test_server_errors_are_not_cached_as_missing(client, monkeypatch):
+    calls: list[str] = []
+    monkeypatch.setattr(client, "_send_request", _failing_send(500, calls))
+
+    assert await client.get_entity_by_code("b280") is None
+    assert await client.get_entity_by_code("b280") is None
+    assert len(calls) == 2
+
+
+# =============================================================================
+# In-memory entity cache
+# =============================================================================
+
+ENTITY_URI = "http://id.who.int/icd/release/11/2025-01/icf/100"
+ENTITY_RESPONSES = {
+    "/icd/release/11/2025-01/icf/codeinfo/b280": {"stemId": ENTITY_URI},
+    "/icd/release/11/2025-01/icf/100": {
+        "code": "b280", "title": {"@value": "Sensation of pain"}, "@id": ENTITY_URI,
+    },
+}
+
+
+async def test_entity_lookups_are_cached(client, fake_send):
+    fake_send.responses = ENTITY_RESPONSES
+
+    first = await client.get_entity_by_code("b280")
+    second = await client.get_entity_by_code("b280")
+
+    assert first is second
+    assert first.title == "Sensation of pain"
+    assert len(fake_send.calls) == 2  # codeinfo + entity, once
+
+
+async def test_zero_cache_size_disables_caching(monkeypatch):
+    client = WHOICFClient(client_id="id", client_secret="secret", max_rps=0, cache_size=0)
+    calls: list[str] = []
+
+    async def send(endpoint, params=None):
+        calls.append(endpoint)
+        if endpoint not in ENTITY_RESPONSES:
+            raise APIError(404, "not found")
+        return ENTITY_RESPONSES[endpoint]
+
+    monkeypatch.setattr(client, "_send_request", send)
+
+    for _ in range(2):
+        entity = await client.get_entity_by_code("b280")
+        assert entity is not None and entity.code == "b280"
+    assert len(calls) == 4
+
+    for _ in range(2):
+        assert await client.get_entity_by_code("b9999") is None
+    assert len(calls) == 6  # Unknown codes are not remembered either
+
+
+async def test_full_codeinfo_response_skips_second_request(client, fake_send):
+    fake_send.responses = {
+        "/icd/release/11/2025-01/icf/codeinfo/b280": {
+            **ENTITY_RESPONSES["/icd/release/11/2025-01/icf/100"],
+            "definition": {"@value": "Sensation of unpleasant feeling."},
+        },
+    }
+
+    entity = await client.get_entity_by_code("b280")
+
+    assert entity.definition == "Sensation of unpleasant feeling."
+    assert await client.get_entity_by_code("b280") is entity
+    assert len(fake_send.calls) == 1
+
+
+async def test_codeinfo_without_details_follows_stem_id(client, fake_send):
+    fake_send.responses = {
+        **ENTITY_RESPONSES,
+        # A title and id alone don't make a full entity
+        "/icd/release/11/2025-01/icf/codeinfo/b280": {
+            "stemId": ENTITY_URI, "title": {"@value": "Sensation of pain"}, "@id": ENTITY_URI,
+        },
+    }
+
+    entity = await client.get_entity_by_code("b280")
+
+    assert entity.code == "b280"
+    assert fake_send.calls == [
+        "/icd/release/11/2025-01/icf/codeinfo/b280",
+        "/icd/release/11/2025-01/icf/100",
+    ]
+
+
+async def test_uri_schemes_share_one_request_and_cache_entry(client, fake_send):
+    fake_send.responses = ENTITY_RESPONSES
+    https_uri = ENTITY_URI.replace("http://", "https://")
+
+    first = await client.get_entity_by_uri(ENTITY_URI)
+    second = await client.get_entity_by_uri(https_uri)
+
+    assert first is second
+    assert fake_send.calls == ["/icd/release/11/2025-01/icf/100"]
+    assert len(client._uri_cache) == 1
+
+
+async def test_uri_query_string_is_kept(client, fake_send):
+    await client.get_entity_by_uri(f"{ENTITY_URI}?include=ancestor")
+    await client.get_entity_by_uri(ENTITY_URI)
+
+    assert fake_send.calls == [
+        "/icd/release/11/2025-01/icf/100?include=ancestor",
+        "/icd/release/11/2025-01/icf/100",
+    ]
+
+
+# =============================================================================
+# Entity parsing
+# =============================================================================
+
+def test_parse_entity_labels(client):
+    entity = client._parse_entity({
+        "code": "b280",
+        "title": {"@value": "Sensation of pain"},
+        "inclusion": [{"label": {"@value": "hurting"}}, {"label": {"@value": "aching"}}],
+        "exclusion": ["numbness", "tingling"],
+    })
+    assert entity.inclusions == ("hurting", "aching")
+    assert entity.exclusions == ("numbness", "tingling")
+
+
+def test_parse_entity_mixed_label_list(client):
+    entity = client._parse_entity({
+        "code": "b280",
+        "title": {"@value": "Sensation of pain"},
+        "inclusion": [{"label": {"@value": "hurting"}}, "aching"],
+        "exclusion": ["numbness", {"label": {"@value": "tingling"}}],
+    })
+    assert entity.inclusions == ("hurting", "aching")
+    assert entity.exclusions == ("numbness", "tingling")
+
+
+# =============================================================================
+# Child fan-out
+# =============================================================================
+
+async def test_zero_max_concurrency_still_fetches_children(monkeypatch):
+    client = WHOICFClient(client_id="id", client_secret="secret", max_rps=0, max_concurrency=0)
+    child_uri = "http://id.who.int/icd/release/11/2025-01/icf/101"
+    responses = {
+        **ENTITY_RESPONSES,
+        "/icd/release/11/2025-01/icf/100": {
+            **ENTITY_RESPONSES["/icd/release/11/2025-01/icf/100"], "child": [child_uri],
+        },
+        "/icd/release/11/2025-01/icf/101": {
+            "code": "b2800", "title": {"@value": "Generalized pain"}, "@id": child_uri,
+        },
+    }
+
+    async def send(endpoint, params=None):
+        return responses[endpoint]
+
+    monkeypatch.setattr(client, "_send_request", send)
+
+    children = await asyncio.wait_for(client.get_children("b280"), timeout=1)
+    assert [c.code for c in children] == ["b2800"]
+
+
+def _entity_uri(n: int) -> str:
+    return f"http://id.who.int/icd/release/11/2025-01/icf/{n}"
+
+
+def _entity_response(n: int, code: str, title: str, **extra) -> dict:
+    return {"code": code, "title": {"@value": title}, "@id": _entity_uri(n), **extra}
+
+
+async def test_inline_child_stubs_skip_fetches(client, fake_send):
+    fake_send.responses = {
+        "/icd/release/11/2025-01/icf/codeinfo/b28": {"stemId": _entity_uri(28)},
+        "/icd/release/11/2025-01/icf/28": _entity_response(28, "b28", "Sensation of pain", child=[
+            {"@id": _entity_uri(280), "code": "b280", "label": {"@value": "Sensation of pain"}},
+            _entity_uri(281),
+            {"@id": _entity_uri(282), "label": {"@value": "Pain in body part"}},
+            {"@id": _entity_uri(283), "code": "b283", "label": {"@language": "en"}},
+            {"@id": _entity_uri(284), "code": "b284", "title": {"@value": "Radiating pain"}},
+        ]),
+        "/icd/release/11/2025-01/icf/281": _entity_response(281, "b281", "Generalized pain"),
+        "/icd/release/11/2025-01/icf/282": _entity_response(282, "b282", "Pain in body part"),
+        "/icd/release/11/2025-01/icf/283": _entity_response(283, "b283", "Pain in head"),
+    }
+
+    children = await client.get_children("b28")
+
+    assert [c.code for c in children] == ["b280", "b281", "b282", "b283", "b284"]
+    # Bare URIs and objects missing a code or a label value are fetched
+    assert fake_send.calls[2:] == [
+        "/icd/release/11/2025-01/icf/281",
+        "/icd/release/11/2025-01/icf/282",
+        "/icd/release/11/2025-01/icf/283",
+    ]
+    assert children[0].definition is None and children[0].children is None
+
+
+async def test_siblings_use_inline_child_stubs(client, fake_send):
+    fake_send.responses = {
+        "/icd/release/11/2025-01/icf/codeinfo/b280": {"stemId": _entity_uri(280)},
+        "/icd/release/11/2025-01/icf/280": _entity_response(
+            280, "b280", "Sensation of pain", parent=[_entity_uri(28)]
+        ),
+        "/icd/release/11/2025-01/icf/28": _entity_response(28, "b28", "Sensation of pain", child=[
+            {"@id": _entity_uri(280), "code": "b280", "label": {"@value": "Sensation of pain"}},
+            {"@id": _entity_uri(284), "code": "b284", "label": {"@value": "Radiating pain"}},
+        ]),
+    }
+
+    entity, siblings = await client.get_siblings("b280")
+
+    assert entity.code == "b280"
+    assert [(s.code, s.title) for s in siblings] == [("b284", "Radiating pain")]
+    assert len(fake_send.calls) == 3  # codeinfo, entity, parent; no child fetches
+
+
+# =============================================================================
+# Category browsing
+# =============================================================================
+
+async def test_different_categories_browse_concurrently(client, fake_send):
+    fake_send.gate.clear()
+    tasks = [asyncio.create_task(client.browse_category(cat)) for cat in ("b", "d")]
+    await _settle()
+    assert len(fake_send.calls) == 2  # Neither browse waits on the other
+
+    fake_send.gate.set()
+    await asyncio.gather(*tasks)
+    await client.browse_category("b")
+    assert len(fake_send.calls) == 2
+
+
+# =============================================================================
+# Disk cache
+# =============================================================================
+
+@pytest.fixture
+def disk_client(tmp_path, monkeypatch):
+    client = WHOICFClient(
+        client_id="id", client_secret="secret", max_rps=0,
+        disk_cache_path=tmp_path / "http.sqlite",
+    )
+    calls: list[str] = []
+
+    async def send(endpoint, params=None):
+        calls.append(endpoint)
+        return {"endpoint": endpoint}
+
+    monkeypatch.setattr(client, "_send_request", send)
+    client.send_calls = calls
+    yield client
+    client._disk_cache.close()
+
+
+async def test_disk_cache_serves_repeat_requests(disk_client):
+    assert await disk_client._api_request("/entity") == {"endpoint": "/entity"}
+    assert await disk_client._api_request("/entity") == {"endpoint": "/entity"}
+    assert disk_client.send_calls == ["/entity"]
+
+
+async def test_corrupt_disk_cache_row_is_refetched(disk_client):
+    await disk_client._api_request("/entity")
+    disk_client._disk_cache._conn.execute("UPDATE responses SET body = ?", (b"{truncat",))
+    disk_client._disk_cache._conn.commit()
+
+    assert await disk_client._api_request("/entity") == {"endpoint": "/entity"}
+    assert await disk_client._api_request("/entity") == {"endpoint": "/entity"}
+    assert disk_client.send_calls == ["/entity", "/entity"]
+
+
+async def test_releases_do_not_evict_each_other(tmp_path):
+    first = _DiskCache(tmp_path / "http.sqlite", "2024-01")
+    await first.set(b"key", {"release": "2024-01"})
+    first.close()
+
+    _DiskCache(tmp_path / "http.sqlite", "2025-01").close()
+
+    reopened = _DiskCache(tmp_path / "http.sqlite", "2024-01")
+    assert await reopened.get(b"key") == {"release": "2024-01"}
+    reopened.close()
+
+
+async def test_disk_cache_prunes_oldest_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(who_client, "DISK_CACHE_PRUNE_INTERVAL", 1)
+    cache = _DiskCache(tmp_path / "http.sqlite", "2025-01", max_rows=2)
+    for n in range(3):
+        await cache.set(b"key%d" % n, {"n": n})
+
+    assert await cache.get(b"key0") is None
+    assert await cache.get(b"key1") == {"n": 1}
+    assert await cache.get(b"key2") == {"n": 2}
+    cache.close()
+
+
+def test_disk_cache_closes_connection_on_setup_failure(tmp_path, monkeypatch):
+    (tmp_path / "http-2025-01.sqlite").write_bytes(b"not a database" * 100)
+    opened = []
+    connect = sqlite3.connect
+
+    def recording_connect(*args, **kwargs):
+        opened.append(connect(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(sqlite3, "connect", recording_connect)
+
+    with pytest.raises(sqlite3.DatabaseError):
+        _DiskCache(tmp_path / "http.sqlite", "2025-01")
+    with pytest.raises(sqlite3.ProgrammingError):
+        opened[0].execute("SELECT 1")